@@ -1,5 +1,6 @@
-from .browser import RemoteBrowser, ChromeBrowser, Browser
+from .browser import RemoteBrowser, ChromeBrowser, Browser, TabSession
 from .by import By
 from .page import AppPage
+from .utils import deadline
 
 __author__ = 'Travis Johnson'
@@ -0,0 +1,115 @@
+import os
+import json
+import gzip
+from base64 import b64decode
+from hashlib import sha1
+from collections import deque
+from threading import Thread, Lock
+from queue import Queue, Full
+from time import strftime
+from uuid import uuid4
+
+from .contract import must_be
+
+
+class ArtifactWriter(object):
+
+    """Writes failure artifacts (screenshot, page source, browser logs) to disk on background threads.
+
+    The browser only grabs the raw artifacts, everything else (decoding, compressing, writing) happens here, off of
+    the thread running the scenario. The queue is bounded, if it's full the artifacts are dropped rather than blocking
+    the scenario. A failure matching one of the last few (same reason, same page state) isn't written again.
+    """
+
+    def __init__(self, directory, workers=2, max_pending=16, recent=32):
+        # Contract
+        must_be(directory, "directory", str)
+        must_be(workers, "workers", int)
+        must_be(max_pending, "max_pending", int)
+        must_be(recent, "recent", int)
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        #
+        self.directory = directory
+        # Browsers can share a directory, keep their file names apart
+        self._id = uuid4().hex[:8]
+        self._queue = Queue(maxsize=max_pending)
+        self._seen = deque(maxlen=recent)
+        self._lock = Lock()
+        self._count = 0
+        self._closed = False
+        self._threads = []
+        for _ in range(workers):
+            thread = Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, reason, screenshot=None, source=None, logs=None):
+        """Queues raw artifacts for writing, returns False if they were a duplicate, dropped, or we're closed.
+
+        screenshot is the base64 string from the driver, source the page source and logs the list of log entries.
+        """
+        # Contract
+        must_be(reason, "reason", str)
+        must_be(screenshot, "screenshot", (type(None), str))
+        must_be(source, "source", (type(None), str))
+        must_be(logs, "logs", (type(None), list))
+        #
+        # Hashing the base64 text is cheap enough and saves decoding duplicates
+        digest = sha1()
+        digest.update(reason.encode('utf-8'))
+        digest.update((screenshot or "").encode('utf-8'))
+        digest.update((source or "").encode('utf-8'))
+        key = digest.hexdigest()
+        with self._lock:
+            if self._closed or key in self._seen:
+                return False
+            prefix = "{}-{}-{:04d}".format(strftime("%Y%m%d-%H%M%S"), self._id, self._count + 1)
+            # Still under the lock, so close can't slip its sentinels in ahead of us
+            try:
+                self._queue.put_nowait((prefix, reason, screenshot, source, logs))
+            except Full:
+                return False
+            self._seen.append(key)
+            self._count += 1
+        return True
+
+    def close(self):
+        """Waits for pending artifacts to be written and stops the workers, safe to call more than once
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception:
+                # Failing to save artifacts should never take down the run
+                pass
+
+    def _write(self, prefix, reason, screenshot, source, logs):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, prefix)
+        with open(path + "-reason.txt", "w") as f:
+            f.write(reason)
+        if screenshot is not None:
+            with open(path + "-screenshot.png", "wb") as f:
+                f.write(b64decode(screenshot.encode('ascii')))
+        if source is not None:
+            with gzip.open(path + "-source.html.gz", "wb") as f:
+                f.write(source.encode('utf-8'))
+        if logs is not None:
+            with open(path + "-browser.log.json", "w") as f:
+                json.dump(logs, f, indent=2)
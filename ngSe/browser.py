@@ -1,21 +1,27 @@
-from time import sleep
+from time import sleep, time
+from copy import copy
+from weakref import proxy, ProxyTypes
 from numbers import Number
 from atexit import register as register_exit
+from threading import RLock
 
 from urllib.error import URLError
 from selenium.webdriver import Chrome, Remote, DesiredCapabilities
 import selenium.common.exceptions as selenium_exceptions
 from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.switch_to import SwitchTo
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
 from .utils import retry
+from .artifacts import ArtifactWriter
 from .page import AppPage
-from .by import By, ByClause
+from .by import By, ByClause, BoundByClause
 from .contract import must_be
 from .exceptions import NavigationError, WaitFailedError, DontRetryError,\
-        FrontEndError
+        FrontEndError, NewWindowError
 from .exceptions import element_exceptions, cant_see_exceptions
 
 default_download_directory = "./tmp"
@@ -23,7 +29,61 @@ default_download_directory = "./tmp"
 
 class BrowserMixin(object):
 
+    # Opt-in failure artifact capture, set through the browsers artifact_directory argument
+    artifacts = None
+
+    def _setup_artifacts(self, artifact_directory):
+        # Contract
+        must_be(artifact_directory, "artifact_directory", (type(None), str))
+        #
+        if artifact_directory is not None:
+            self.artifacts = ArtifactWriter(artifact_directory)
+
+    def capture_failure(self, error, cause=None):
+        """Grabs the raw failure artifacts and hands them off to be written in the background.
+
+        Does nothing unless artifacts are turned on. Errors (or their causes) that have already been captured are
+        skipped, so nested retries giving up one after the other only capture once.
+
+        This costs up to three driver round trips (screenshot, source, logs) and happens after a retry has given up, so
+        it's outside of any deadline budget. If the driver answers neither of the first two, logs aren't tried.
+        """
+        if self.artifacts is None:
+            return
+        if cause is None:
+            cause = getattr(error, 'cause', None)
+        already = getattr(error, '_ngse_captured', False) or getattr(cause, '_ngse_captured', False)
+        try:
+            error._ngse_captured = True
+        except AttributeError:
+            pass
+        if already:
+            return
+
+        # This runs while the real error is being raised, nothing in here may replace it
+        try:
+            screenshot = source = logs = None
+            try:
+                screenshot = self.get_screenshot_as_base64()
+            except Exception:
+                pass
+            try:
+                source = self.page_source
+            except Exception:
+                pass
+            if screenshot is not None or source is not None:
+                try:
+                    logs = self.get_log('browser')
+                except Exception:
+                    # Not every driver supports logs
+                    pass
+            self.artifacts.submit(repr(error), screenshot, source, logs)
+        except Exception:
+            pass
+
     def quit(self):
+        if self.artifacts is not None:
+            self.artifacts.close()
         try:
             super(BrowserMixin, self).quit()
         except URLError as e:
@@ -38,17 +98,27 @@ class BrowserMixin(object):
             # browser
             pass
 
+    @staticmethod
+    def _unbind(what, by):
+        """Bound clauses carry their own ByClause, everything else goes with
+        the one passed in
+        """
+        if isinstance(what, BoundByClause):
+            return what.unbind()
+        return what, by
+
     def wait_for(self, value, by=By.ID, **kwargs):
         """Waits for an element according to the passed ByClause
 
         This is really just a wrapper around passing the browser to a
-        ByClause, allowing for much cleaner syntax.
+        ByClause, allowing for much cleaner syntax. value can also be a bound
+        clause (By.ID("x").within(...)), by is ignored then.
         """
         # Contract
-        must_be(value, "value", str)
+        must_be(value, "value", (str, BoundByClause))
         must_be(by, "by", ByClause)
         #
-
+        value, by = self._unbind(value, by)
         return by.wait(value, self, **kwargs)
 
     def goto(self, url):
@@ -60,7 +130,9 @@ class BrowserMixin(object):
         value = super(BrowserMixin, self).get(url)
         page_title = self.title
         if page_title in {'404 Not Found'}:
-            raise NavigationError(page_title)
+            error = NavigationError(page_title)
+            self.capture_failure(error)
+            raise error
         return value
 
     def navigate(self, to):
@@ -77,26 +149,33 @@ class BrowserMixin(object):
         if to.wait_for is not None:
             try:
                 retry(to.wait_for_by.wait)(to.wait_for, self)
-            except selenium_exceptions.NoSuchElementException:
-                raise NavigationError(
+            except selenium_exceptions.NoSuchElementException as e:
+                error = NavigationError(
                     "Expected element {}:{} didn't show when navigating to {}".format(  # nopep8
                         to.wait_for,
                         to.wait_for_by,
                         to.page))
+                self.capture_failure(error, e)
+                raise error
         return return_value
 
     @retry(timeout=15)
     def click(self, what, by=By.LINK_TEXT, hover_time=0.1, wait_for=None,
               wait_for_by=By.ID):
         """Find, hover on, and click on the given element
+
+        what and wait_for can also be bound clauses, their by's are ignored
+        then.
         """
         # Contract
-        must_be(what, "element", str)
+        must_be(what, "element", (str, BoundByClause))
         must_be(by, "by", ByClause)
         must_be(hover_time, "hover_time", Number)
-        must_be(wait_for, "wait_for", (type(None), str))
+        must_be(wait_for, "wait_for", (type(None), str, BoundByClause))
         must_be(wait_for_by, "wait_for_by", (type(None), ByClause))
         #
+        what, by = self._unbind(what, by)
+        wait_for, wait_for_by = self._unbind(wait_for, wait_for_by)
         element = by.find(what, self)
         self.hover_on(element, hover_time)
         return_value = element.click()
@@ -108,7 +187,9 @@ class BrowserMixin(object):
             except cant_see_exceptions as e:
                 # TODO[TJ]: This custom exception feels clunky, only used for,
                 # and only outside of, the wait method
-                raise WaitFailedError("Wait failed", e)
+                error = WaitFailedError("Wait failed", e)
+                self.capture_failure(error)
+                raise error
             except element_exceptions as e:
                 # Some weird stuff, this shouldn't happen
                 raise DontRetryError("Wait failed", e)
@@ -176,10 +257,11 @@ class BrowserMixin(object):
 
     def fill(self, what, text, by=By.ID, check=False, check_against=None,
              check_attribute="value", empty=False):
-        """Finds and fills in an element with the given text.
+        """Finds and fills in an element with the given text, what can also be
+        a bound clause.
         """
         # Contract
-        must_be(what, "element", str)
+        must_be(what, "element", (str, BoundByClause))
         must_be(text, "text", str)
         must_be(by, "by", ByClause)
         must_be(check, "check", bool)
@@ -187,6 +269,7 @@ class BrowserMixin(object):
         must_be(check_attribute, "check_attribute", str)
         must_be(empty, "empty", bool)
         #
+        what, by = self._unbind(what, by)
         element = by.find(what, self)
         return self._fill(element, text, by, check, check_against,
                           check_attribute, empty)
@@ -203,14 +286,18 @@ class BrowserMixin(object):
         except not_there_exceptions:
             pass
         else:
-            raise FrontEndError('Warning alert is on screen')
+            error = FrontEndError('Warning alert is on screen')
+            self.capture_failure(error)
+            raise error
 
         try:
             self.find_element_by_css_selector('.alertContainer .alert-danger')
         except not_there_exceptions:
             pass
         else:
-            raise FrontEndError('Danger alert is on screen')
+            error = FrontEndError('Danger alert is on screen')
+            self.capture_failure(error)
+            raise error
 
         self.find_element_by_css_selector('.alertContainer .alert-success')
         # Close the alert
@@ -225,14 +312,14 @@ class BrowserMixin(object):
         else:
             return True
 
-    @retry
+    @retry(capture=False)
     def _text_is_present(self, text):
         self.find_element_by_tag_name('body').text.index(text)
 
 
 class RemoteBrowser(BrowserMixin, Remote):
     def __init__(self, scenario, selenium_host, app_host=None, app_port=None,
-                 pages=None):
+                 pages=None, artifact_directory=None):
 
         must_be(app_host, "app_host", (type(None), str))
         must_be(app_port, "app_port", (type(None), Number))
@@ -248,6 +335,7 @@ class RemoteBrowser(BrowserMixin, Remote):
         self.pages = pages
         self.app_host = app_host
         self.app_port = app_port
+        self._setup_artifacts(artifact_directory)
 
         super(RemoteBrowser, self).__init__(
             desired_capabilities=DesiredCapabilities.CHROME,
@@ -262,7 +350,7 @@ class ChromeBrowser(BrowserMixin, Chrome):
 
     def __init__(self, scenario, download_directory=default_download_directory,
                  app_host=None, app_port=None, executable_path=None,
-                 pages=None):
+                 pages=None, artifact_directory=None):
         # Contract
         must_be(download_directory, "download_directory", (type(None), str))
         must_be(app_host, "app_host", (type(None), str))
@@ -290,10 +378,249 @@ class ChromeBrowser(BrowserMixin, Chrome):
         if executable_path is not None:
             self.executable_path = executable_path
         self.pages = pages
+        self._setup_artifacts(artifact_directory)
         super(ChromeBrowser, self).__init__(
             executable_path=self.executable_path, chrome_options=options)
         register_exit(self.quit)
 
 
+class TabSession(object):
+
+    """Runs several scenarios in one browser process, each in its own window.
+
+    Get a browser per scenario with `new_browser`, they share the driver session, switch to their own window before
+    every command, and take turns talking to the driver. Once multiplexed, the original browser shouldn't be driven
+    directly.
+
+    Windows in a session share cookies and storage, WebDriver has no per-window cookie jars. If scenarios need
+    separate logins, give each one a different app_host (say, 'localhost' and '127.0.0.1'), cookies are per host.
+
+    Each browser keeps track of its own window and frame: switching windows resets the frame, so the frames a browser
+    was in get re-entered when it gets its turn back. A popup nobody owns becomes the browser's once it switches to it,
+    switching to another browser's window raises NoSuchWindowException. Closing its window leaves a browser without
+    one until it switches to another.
+    """
+
+    def __init__(self, browser):
+        # Contract
+        must_be(browser, "browser", (BrowserMixin, Remote))
+        if isinstance(browser, TabBrowser):
+            raise ValueError("browser must be a real browser, not a TabBrowser")
+        #
+        self.browser = browser
+        self.lock = RLock()
+        self.current = browser.current_window_handle
+        self._free = [self.current]
+        self._open = set(self._free)
+        # handle -> the TabBrowser it belongs to
+        self._owners = {}
+
+    def new_browser(self, scenario, app_host=None, app_port=None, pages=None,
+                    artifact_directory=None):
+        """Returns a browser for scenario in a window of its own
+        """
+        return TabBrowser(self, scenario, app_host=app_host,
+                          app_port=app_port, pages=pages,
+                          artifact_directory=artifact_directory)
+
+    # How long to wait for window.open to show up in the window handles
+    new_window_timeout = 5
+
+    def _acquire_window(self, tab):
+        with self.lock:
+            if self._free:
+                handle = self._free.pop()
+                self._owners[handle] = tab
+                return handle
+            before = set(self.browser.window_handles)
+            self.browser.execute_script("window.open('about:blank');")
+            end_time = time() + self.new_window_timeout
+            while True:
+                new = set(self.browser.window_handles) - before
+                if new:
+                    break
+                if time() > end_time:
+                    raise NewWindowError(
+                        "No new window appeared after {} seconds, is a popup blocker on?".format(  # nopep8
+                            self.new_window_timeout))
+                sleep(0.1)
+            handle = new.pop()
+            self._open.add(handle)
+            self._owners[handle] = tab
+            return handle
+
+    def _find_window(self, target, tab):
+        """Returns the handle of the window tab can switch to by target (a
+        handle or window name)
+        """
+        with self.lock:
+            handles = self.browser.window_handles
+            if target not in handles:
+                found = None
+                try:
+                    for handle in handles:
+                        # Only look at windows tab could have, so the name
+                        # lookup doesn't go through other browsers' pages
+                        if self._owners.get(handle, tab) is not tab or handle in self._free:
+                            continue
+                        self._switch(handle, force=True)
+                        if self.browser.execute_script("return window.name") == target:
+                            found = handle
+                            break
+                finally:
+                    # We've lost whatever frame the owner was in, make the
+                    # next command switch (and re-enter its frames)
+                    self.current = None
+                if found is None:
+                    raise selenium_exceptions.NoSuchWindowException(
+                        "No window {} in this session".format(target))
+                target = found
+            if self._owners.get(target, tab) is not tab or target in self._free:
+                raise selenium_exceptions.NoSuchWindowException(
+                    "Window {} belongs to another browser in this session".format(target))  # nopep8
+            return target
+
+    def _release_window(self, handle):
+        with self.lock:
+            if handle not in self._open:
+                return
+            self._owners.pop(handle, None)
+            try:
+                self._switch(handle)
+            except selenium_exceptions.NoSuchWindowException:
+                # The page closed it on its own (say, a popup)
+                self._open.discard(handle)
+                self.current = None
+                return
+            if len(self._open) > 1:
+                self.browser.close()
+                self._open.discard(handle)
+                self.current = None
+            else:
+                # Closing the last window ends the session, keep it around
+                self.browser.get('about:blank')
+                self._free.append(handle)
+
+    def _switch(self, handle, frames=(), force=False):
+        # Caller must hold the lock. Switching windows drops the frame, so
+        # re-enter the frames the owner was in.
+        if force or self.current != handle:
+            self.browser.switch_to.window(handle)
+            self.current = handle
+            for params in frames:
+                self.browser.execute(Command.SWITCH_TO_FRAME, dict(params))
+
+
+class TabSwitchTo(SwitchTo):
+
+    """Sends window switches as one command, the TabSession resolves window
+    names itself rather than have us try every window in the session
+    """
+
+    def window(self, window_name):
+        self._driver.execute(Command.SWITCH_TO_WINDOW,
+                             {'handle': window_name, 'name': window_name})
+
+
+class TabBrowser(BrowserMixin, Remote):
+
+    """A browser living in one window of a TabSession, see TabSession.new_browser
+    """
+
+    def __init__(self, session, scenario, app_host=None, app_port=None,
+                 pages=None, artifact_directory=None):
+        # Contract
+        must_be(session, "session", TabSession)
+        must_be(app_host, "app_host", (type(None), str))
+        must_be(app_port, "app_port", (type(None), Number))
+        must_be(pages, "pages", (dict, type(None)))
+        must_be(artifact_directory, "artifact_directory", (type(None), str))
+        if pages is not None:
+            for key, value in pages.items():
+                must_be(key, "pages key", str)
+                must_be(value, "pages value", AppPage)
+        #
+        # Share the hosts driver session rather than starting a new one
+        host = session.browser
+        self.__dict__.update(host.__dict__)
+        for name, value in host.__dict__.items():
+            # Helpers like switch_to hold on to their driver (sometimes through
+            # a weakref proxy), point them at us
+            driver = getattr(value, '_driver', None)
+            if driver is host or isinstance(driver, ProxyTypes) and driver == host:
+                helper = copy(value)
+                helper._driver = proxy(self) if isinstance(driver, ProxyTypes) else self
+                setattr(self, name, helper)
+
+        self._tab_session = session
+        self.scenario = scenario
+        if app_host is not None:
+            self.app_host = app_host
+        if app_port is not None:
+            self.app_port = app_port
+        if pages is not None:
+            self.pages = pages
+        self.artifacts = None
+        self._switch_to = TabSwitchTo(self)
+        # Get the window first, so a failure doesn't leave writer threads
+        # behind
+        self.handle = session._acquire_window(self)
+        self._setup_artifacts(artifact_directory)
+        # Every window this browser has been in (popups included), and the
+        # frames it's in within the current one
+        self._windows = {self.handle}
+        self._frames = []
+
+    def execute(self, driver_command, params=None):
+        session = self._tab_session
+        with session.lock:
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                # Moving to a popup (or back), it's ours from now on
+                handle = session._find_window(
+                    params.get('handle', params.get('name')), self)
+                params = dict((key, handle) for key in params
+                              if key in ('handle', 'name'))
+                result = super(TabBrowser, self).execute(driver_command, params)
+                self.handle = handle
+                self._windows.add(handle)
+                self._frames = []
+                session.current = handle
+                session._open.add(handle)
+                session._owners[handle] = self
+                return result
+
+            if self.handle is None:
+                raise selenium_exceptions.NoSuchWindowException(
+                    "This browser's window was closed, switch to another one")
+            session._switch(self.handle, self._frames)
+            result = super(TabBrowser, self).execute(driver_command, params)
+
+            if driver_command == Command.SWITCH_TO_FRAME:
+                if params.get('id') is None:
+                    self._frames = []
+                else:
+                    self._frames.append(params)
+            elif driver_command == getattr(Command, 'SWITCH_TO_PARENT_FRAME', None):
+                self._frames = self._frames[:-1]
+            elif driver_command == Command.CLOSE:
+                session._open.discard(self.handle)
+                session._owners.pop(self.handle, None)
+                self._windows.discard(self.handle)
+                session.current = None
+                self.handle = None
+                self._frames = []
+            return result
+
+    def quit(self):
+        """Gives the windows back to the session, the browser process is left running
+        """
+        if self.artifacts is not None:
+            self.artifacts.close()
+        for handle in self._windows:
+            self._tab_session._release_window(handle)
+        self._windows = set()
+        self.handle = None
+
+
 # XXX This is here for backwards compatablity, should be removed later
 Browser = ChromeBrowser
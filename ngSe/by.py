@@ -1,4 +1,5 @@
 from selenium.webdriver import Remote
+from selenium.webdriver.remote.webelement import WebElement
 import selenium.common.exceptions as selenium_exceptions
 from selenium.webdriver.common.by import By as selenium_by
 
@@ -71,6 +72,21 @@ class ByClause(object):
     def convert(self, *args, **kwargs):
         raise NotImplementedError
 
+    def __call__(self, what):
+        """Binds a search value to this clause, the result can be scoped with `within`
+        """
+        return BoundByClause(self, what)
+
+    def within(self, parent):
+        """Returns a clause that searches inside of the element found by parent (a bound clause)
+        """
+        return ScopedByClause(self, parent)
+
+    def levels(self, what):
+        """Returns the (by, value) pairs to resolve, outermost first. Plain clauses only have the one.
+        """
+        return [(self.by, self.convert(what))]
+
     @retry(timeout=5)
     def wait(self, what, browser):
         """Waits for (or tries to) the desired effect, by default this is for the element to be available.
@@ -107,6 +123,18 @@ class NegativeByClause(ByClause):
         must_be(base_by_clause, "base_by_clause", ByClause)
         #
         ByClause.__init__(self, base_by_clause.by, base_by_clause.convert)
+        self.base = base_by_clause
+
+    def find(self, what, browser):
+        # Delegate, so scoped clauses keep their scope when negated
+        return self.base.find(what, browser)
+
+    def levels(self, what):
+        return self.base.levels(what)
+
+    def within(self, parent):
+        # Scope the base and negate that, so waiting still waits for the element to 'leave'
+        return NegativeByClause(self.base.within(parent))
 
     @retry(timeout=5)
     def wait(self, what, browser):
@@ -124,6 +152,230 @@ class NegativeByClause(ByClause):
             raise ElementStillThereError
 
 
+class BoundByClause(object):
+
+    """A ByClause together with its search value, optionally scoped inside of another bound clause.
+
+    Chains like `By.NG_MODEL("x").within(By.TABLE_PATH("..."))` are resolved in a single script call, rather than one
+    find per level. Browser methods take these in place of the value, e.g. `browser.click(By.INNER_TEXT("Save")
+    .within(...))`, see `unbind` for turning one into the usual value and ByClause.
+    """
+
+    def __init__(self, clause, what, parent=None):
+        # Contract
+        must_be(clause, "clause", ByClause)
+        must_be(what, "what", str)
+        must_be(parent, "parent", (type(None), BoundByClause))
+        #
+        self.clause = clause
+        self.what = what
+        self.parent = parent
+
+    def __repr__(self):
+        if self.parent is None:
+            return "<{}: [{}] by: {}>".format(type(self), self.what, self.clause)
+        return "<{}: [{}] by: {} within {}>".format(type(self), self.what, self.clause, self.parent)
+
+    def within(self, parent):
+        """Returns this bound clause scoped inside of parent, chained scopes nest outwards
+        """
+        # Contract
+        must_be(parent, "parent", BoundByClause)
+        #
+        if self.parent is not None:
+            parent = self.parent.within(parent)
+        return BoundByClause(self.clause, self.what, parent)
+
+    def levels(self):
+        """Returns the (by, value) pairs to resolve, outermost first
+        """
+        levels = [] if self.parent is None else self.parent.levels()
+        return levels + self.clause.levels(self.what)
+
+    def unbind(self):
+        """Returns the (what, by) pair the rest of the library works with, by being scoped if we have a parent
+        """
+        if self.parent is None:
+            return self.what, self.clause
+        return self.what, self.clause.within(self.parent)
+
+    def wait(self, browser):
+        """Waits for the element to be available, or to 'leave' if the clause is a negative one
+        """
+        what, by = self.unbind()
+        return by.wait(what, browser)
+
+    def find(self, browser):
+        """Finds the element in the provided browser
+        """
+        what, by = self.unbind()
+        return by.find(what, browser)
+
+
+class ScopedByClause(ByClause):
+
+    """A ByClause whose search happens inside of the element found by a bound clause, usable anywhere a ByClause is
+    """
+
+    def __init__(self, base_by_clause, parent):
+        # Contract
+        must_be(base_by_clause, "base_by_clause", ByClause)
+        must_be(parent, "parent", BoundByClause)
+        if isinstance(base_by_clause, NegativeByClause):
+            raise ValueError("negative clauses can't be scoped directly, use their within method")
+        #
+        ByClause.__init__(self, base_by_clause.by, base_by_clause.convert)
+        self.base = base_by_clause
+        self.parent = parent
+
+    def __repr__(self):
+        return "<{}: internal by: {} within {}>".format(type(self), self.by, self.parent)
+
+    def within(self, parent):
+        return ScopedByClause(self.base, self.parent.within(parent))
+
+    def levels(self, what):
+        return self.parent.levels() + self.base.levels(what)
+
+    def find(self, what, browser):
+        # Contract
+        must_be(what, "what", str)
+        must_be(browser, "browser", Remote)
+        #
+        return _find_levels(self.levels(what), browser)
+
+
+def _css_escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _xpath_literal(value):
+    """Quotes value as an XPath string, XPath has no escapes so values with both quote types need concat()
+    """
+    if '"' not in value:
+        return '"{}"'.format(value)
+    if "'" not in value:
+        return "'{}'".format(value)
+    parts = value.split('"')
+    return "concat({})".format(", '\"', ".join('"{}"'.format(part) for part in parts))
+
+
+def _scope_xpath(value):
+    """Makes an XPath relative to the element it's evaluated against.
+
+    Every location path starting from the root ('//tr', '(//tr)[3]', each side of '//a | //b') gets a '.' put in
+    front. Paths inside of predicates are left alone, those are about the document on purpose.
+    """
+    scoped = []
+    quote = None
+    depth = 0
+    # Whether the next thing is the start of a path (start of the expression, after '(' or '|')
+    starting = True
+    for index, char in enumerate(value):
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif depth == 0 and starting:
+            if char == '/':
+                scoped.append('.')
+            elif value.startswith('id(', index) or value.startswith('id (', index):
+                raise ValueError("xpath [{}] uses id(), which can't be scoped".format(value))
+        if quote is None and depth == 0 and not char.isspace():
+            starting = char in '(|'
+        scoped.append(char)
+    return "".join(scoped)
+
+
+def _split_selector_list(value):
+    """Splits a CSS selector list on its top-level commas ('a, b' but not ':is(a, b)' or '[title="a,b"]')
+    """
+    parts = []
+    current = []
+    quote = None
+    depth = 0
+    for char in value:
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return parts
+
+
+# Everything gets turned into CSS or XPath so a whole chain can be resolved in-page
+_level_converters = {
+    selenium_by.ID: lambda v: (selenium_by.CSS_SELECTOR, '[id="{}"]'.format(_css_escape(v))),
+    selenium_by.NAME: lambda v: (selenium_by.CSS_SELECTOR, '[name="{}"]'.format(_css_escape(v))),
+    selenium_by.CLASS_NAME: lambda v: (selenium_by.CSS_SELECTOR, '.{}'.format(v)),
+    selenium_by.TAG_NAME: lambda v: (selenium_by.CSS_SELECTOR, v),
+    selenium_by.CSS_SELECTOR: lambda v: (selenium_by.CSS_SELECTOR, v),
+    selenium_by.LINK_TEXT: lambda v: (selenium_by.XPATH, './/a[normalize-space(.)={}]'.format(_xpath_literal(v))),
+    selenium_by.PARTIAL_LINK_TEXT: lambda v: (selenium_by.XPATH, './/a[contains(., {})]'.format(_xpath_literal(v))),
+    # Paths starting from the root would escape the scope, make them relative to the parent
+    selenium_by.XPATH: lambda v: (selenium_by.XPATH, _scope_xpath(v)),
+}
+
+_find_levels_script = """
+var levels = arguments[0], node = document;
+for (var i = 0; i < levels.length; i++) {
+    if (levels[i][0] === "xpath") {
+        node = document.evaluate(
+            levels[i][1], node, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } else {
+        node = node.querySelector(levels[i][1]);
+    }
+    if (!node) {
+        return i;
+    }
+}
+return node;
+"""
+
+
+def _convert_levels(levels):
+    """Turns (by, value) levels into the CSS/XPath ones the find script understands
+    """
+    converted = []
+    for index, (by, value) in enumerate(levels):
+        if by not in _level_converters:
+            raise ValueError("by type [{}] can't be used in a scoped search".format(by))
+        by, value = _level_converters[by](value)
+        if by == selenium_by.CSS_SELECTOR and index > 0:
+            # querySelector matches against the whole document, :scope keeps ancestors out of it
+            value = ", ".join(":scope {}".format(part) for part in _split_selector_list(value))
+        converted.append((by, value))
+    return converted
+
+
+def _find_levels(levels, browser):
+    """Resolves a chain of (by, value) levels, outermost first, in one round trip
+    """
+    converted = _convert_levels(levels)
+    result = browser.execute_script(_find_levels_script, converted)
+    if isinstance(result, WebElement):
+        return result
+    index = result if isinstance(result, int) else len(levels) - 1
+    raise selenium_exceptions.NoSuchElementException(
+        "Unable to locate element\n  (Element: [{}], By: [{}], level {} of {})".format(
+            levels[index][1], levels[index][0], index + 1, len(levels)))
+
+
 def _inner_text_convert(value):
     # Contract
     must_be(value, "value", str)
@@ -42,6 +42,13 @@ class FrontEndError(Exception):
     pass
 
 
+class NewWindowError(Exception):
+
+    """Raised when a TabSession can't get a new window out of the browser
+    """
+    pass
+
+
 
 element_exceptions = (
     selenium_exceptions.InvalidElementStateException,
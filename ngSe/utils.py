@@ -1,19 +1,64 @@
 from functools import wraps
+from contextlib import contextmanager
+from threading import local
 from time import time, sleep
 
 from .exceptions import element_exceptions
 
 
-def retry(f=None, timeout=30, interval=0.1):
+# The deadline every retry running in this thread must finish by, None when unbounded
+_budget = local()
+
+
+def current_deadline():
+    """Returns the time (as from time.time) the current step has to finish by, or None if there isn't one
+    """
+    return getattr(_budget, 'deadline', None)
+
+
+@contextmanager
+def deadline(seconds):
+    """Gives everything inside of it a time budget of seconds, nested retries will give up once it's spent.
+
+    Budgets only ever shrink: nesting a longer budget inside a shorter one keeps the shorter one.
+    """
+    end_time = time() + seconds
+    previous = current_deadline()
+    if previous is not None:
+        end_time = min(end_time, previous)
+    _budget.deadline = end_time
+    try:
+        yield end_time
+    finally:
+        _budget.deadline = previous
+
+
+def _capture_failure(args, error):
+    """Hands the error to the first argument that knows how to capture failures (a browser), if any
+    """
+    for arg in args:
+        capture = getattr(arg, 'capture_failure', None)
+        if capture is not None and hasattr(capture, "__call__"):
+            capture(error)
+            return
+
+
+def retry(f=None, timeout=30, interval=0.1, capture=True):
     """
     When working with a responsive UI, sometimes elements are not ready at the very second you request it
     This wrapper will keep on retrying finding or interacting with the element until its ready
+
+    The timeout is capped by the current deadline, and becomes the deadline for anything retried inside of it, so
+    nested retries never outlive their caller.
+
+    When the outermost retry gives up, failure artifacts are captured from the browser it was given, unless capture is
+    False (for when giving up is a normal answer). Capturing happens after the timeout, outside of the deadline.
     """
 
     # This allows us to use '@retry' or '@retry(timeout=thing, interval=other_thing)' for custom times
     if f is None:
         def rwrapper(f):
-            return retry(f, timeout, interval)
+            return retry(f, timeout, interval, capture)
         return rwrapper
 
     @wraps(f)
@@ -24,16 +69,31 @@ def retry(f=None, timeout=30, interval=0.1):
         prep = kwargs.pop('prep', None)
 
         end_time = time() + retry_timeout
+        previous = current_deadline()
+        if previous is not None:
+            end_time = min(end_time, previous)
 
-        while True:
-            try:
-                if prep is not None:
-                    prep()
-                return f(*args, **kwargs)
-            except element_exceptions:
-                if time() > end_time:
-                    # timeout, re-raise the original exception
-                    raise
-                sleep(retry_interval)
+        # Only the outermost retry captures, inner ones giving up are its business
+        outermost = not getattr(_budget, 'retrying', False)
+        _budget.deadline = end_time
+        _budget.retrying = True
+        try:
+            while True:
+                try:
+                    if prep is not None:
+                        prep()
+                    return f(*args, **kwargs)
+                except element_exceptions as e:
+                    remaining = end_time - time()
+                    if remaining <= 0:
+                        # timeout, let any browser we were given record the failure, then re-raise the original
+                        # exception
+                        if outermost and capture:
+                            _capture_failure(args, e)
+                        raise
+                    sleep(min(retry_interval, remaining))
+        finally:
+            _budget.deadline = previous
+            _budget.retrying = not outermost
 
     return wrapper
@@ -0,0 +1,191 @@
+import os
+from base64 import b64encode
+from threading import Event
+from time import sleep
+
+from urllib.error import URLError
+from selenium.webdriver import Remote
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from ngSe.artifacts import ArtifactWriter
+from ngSe.browser import BrowserMixin
+from ngSe.exceptions import WaitFailedError
+from ngSe.utils import retry
+
+
+screenshot = b64encode(b"png").decode('ascii')
+
+
+def test_duplicates_are_written_once(tmpdir):
+    writer = ArtifactWriter(str(tmpdir))
+    assert writer.submit("same", screenshot, "<html></html>", [])
+    assert not writer.submit("same", screenshot, "<html></html>", [])
+    writer.close()
+    assert len([name for name in os.listdir(str(tmpdir)) if name.endswith("-reason.txt")]) == 1
+
+
+def test_different_errors_on_the_same_page_are_kept(tmpdir):
+    writer = ArtifactWriter(str(tmpdir))
+    # A dead driver gives nothing at all, each failure should still be recorded
+    assert writer.submit("first")
+    assert writer.submit("second")
+    writer.close()
+
+
+def test_only_recent_duplicates_are_dropped(tmpdir):
+    writer = ArtifactWriter(str(tmpdir), recent=1)
+    assert writer.submit("first")
+    assert writer.submit("second")
+    assert writer.submit("first")
+    writer.close()
+
+
+def test_writers_sharing_a_directory_dont_collide(tmpdir):
+    first = ArtifactWriter(str(tmpdir))
+    second = ArtifactWriter(str(tmpdir))
+    first.submit("first", screenshot, "<p>1</p>", None)
+    second.submit("second", screenshot, "<p>2</p>", None)
+    first.close()
+    second.close()
+    assert len([name for name in os.listdir(str(tmpdir)) if name.endswith("-reason.txt")]) == 2
+
+
+def test_dropped_artifacts_can_be_resubmitted(tmpdir):
+    writer = ArtifactWriter(str(tmpdir), workers=1, max_pending=1)
+    blocked = Event()
+    release = Event()
+    write = writer._write
+
+    def slow_write(*args):
+        blocked.set()
+        release.wait()
+        write(*args)
+    writer._write = slow_write
+
+    assert writer.submit("busy", screenshot, "<p>busy</p>", None)
+    blocked.wait()
+    assert writer.submit("queued", screenshot, "<p>queued</p>", None)
+    assert not writer.submit("dropped", screenshot, "<p>dropped</p>", None)
+    release.set()
+    while writer._queue.qsize():
+        sleep(0.01)
+    assert writer.submit("dropped", screenshot, "<p>dropped</p>", None)
+    writer.close()
+
+
+def test_nothing_is_accepted_after_close(tmpdir):
+    writer = ArtifactWriter(str(tmpdir))
+    writer.close()
+    assert not writer.submit("late", screenshot, "<p>late</p>", None)
+
+
+class FakeBrowser(object):
+
+    def __init__(self):
+        self.captured = []
+
+    def capture_failure(self, error):
+        self.captured.append(error)
+
+
+def test_only_the_outermost_retry_captures():
+    browser = FakeBrowser()
+
+    @retry(timeout=0.2, interval=0.01)
+    def inner(browser):
+        raise NoSuchElementException("nope")
+
+    @retry(timeout=0.3, interval=0.01)
+    def outer(browser):
+        inner(browser)
+
+    try:
+        outer(browser)
+    except NoSuchElementException:
+        pass
+    assert len(browser.captured) == 1
+
+
+def test_retry_can_skip_capture():
+    browser = FakeBrowser()
+
+    @retry(timeout=0.05, interval=0.01, capture=False)
+    def look(browser):
+        raise NoSuchElementException("nope")
+
+    try:
+        look(browser)
+    except NoSuchElementException:
+        pass
+    assert browser.captured == []
+
+
+class RecordingWriter(object):
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, *args):
+        self.submitted.append(args)
+
+
+class DriverlessBrowser(BrowserMixin, Remote):
+
+    """Answers the capture calls with canned values (or errors)
+    """
+
+    def __init__(self, screenshot=None, source=None, logs=None):
+        self.artifacts = RecordingWriter()
+        self.answers = {'screenshot': screenshot, 'source': source, 'logs': logs}
+        self.calls = []
+
+    def _answer(self, what):
+        self.calls.append(what)
+        answer = self.answers[what]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def get_screenshot_as_base64(self):
+        return self._answer('screenshot')
+
+    @property
+    def page_source(self):
+        return self._answer('source')
+
+    def get_log(self, log_type):
+        return self._answer('logs')
+
+
+def test_capture_failure_keeps_what_it_can_get():
+    browser = DriverlessBrowser(screenshot=URLError("refused"), source="<p></p>", logs=AttributeError("no logs"))
+    browser.capture_failure(NoSuchElementException("nope"))
+    assert len(browser.artifacts.submitted) == 1
+    reason, shot, source, logs = browser.artifacts.submitted[0]
+    assert (shot, source, logs) == (None, "<p></p>", None)
+
+
+def test_capture_failure_gives_up_early_on_a_dead_driver():
+    dead = ConnectionRefusedError()
+    browser = DriverlessBrowser(screenshot=dead, source=dead, logs=dead)
+    browser.capture_failure(NoSuchElementException("nope"))
+    assert browser.calls == ['screenshot', 'source']
+    assert len(browser.artifacts.submitted) == 1
+
+
+def test_capture_failure_never_raises():
+    browser = DriverlessBrowser(screenshot=screenshot, source="<p></p>", logs=[])
+
+    def broken(*args):
+        raise WebDriverException("writer broke")
+    browser.artifacts.submit = broken
+    browser.capture_failure(NoSuchElementException("nope"))
+
+
+def test_capture_failure_skips_captured_errors_and_causes():
+    browser = DriverlessBrowser(screenshot=screenshot, source="<p></p>", logs=[])
+    error = NoSuchElementException("nope")
+    browser.capture_failure(error)
+    browser.capture_failure(error)
+    browser.capture_failure(WaitFailedError("Wait failed", error))
+    assert len(browser.artifacts.submitted) == 1
@@ -0,0 +1,121 @@
+import pytest
+from selenium.webdriver import Remote
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.webelement import WebElement
+
+from ngSe.browser import BrowserMixin
+from ngSe.by import By, NegativeByClause, ScopedByClause, _convert_levels, _find_levels, _xpath_literal
+
+
+class FakeBrowser(BrowserMixin, Remote):
+
+    """Just enough of a browser to answer the find script, without a driver
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append(args)
+        return self.result
+
+
+def test_root_xpath_is_made_relative():
+    levels = _convert_levels([("css selector", "table"), ("xpath", "//tr[3]")])
+    assert levels[1] == ("xpath", ".//tr[3]")
+
+
+@pytest.mark.parametrize("xpath, scoped", [
+    ("(//tr)[3]", "(.//tr)[3]"),
+    ("//a | //b", ".//a | .//b"),
+    ("(//a | //b)[1]", "(.//a | .//b)[1]"),
+    ('//a[contains(., "x|/y")]', './/a[contains(., "x|/y")]'),
+    ("//a[count(//b) = 1]", ".//a[count(//b) = 1]"),
+])
+def test_every_root_path_is_made_relative(xpath, scoped):
+    assert _convert_levels([("xpath", xpath)]) == [("xpath", scoped)]
+
+
+def test_unscopable_xpath_raises():
+    with pytest.raises(ValueError):
+        _convert_levels([("xpath", 'id("grid")/tr')])
+
+
+def test_relative_xpath_is_left_alone():
+    assert _convert_levels([("xpath", "td[2]")]) == [("xpath", "td[2]")]
+
+
+def test_inner_css_levels_are_scoped():
+    levels = _convert_levels([("css selector", "table"), ("css selector", "tr td")])
+    assert levels == [("css selector", "table"), ("css selector", ":scope tr td")]
+
+
+def test_inner_css_selector_lists_are_scoped_per_part():
+    levels = _convert_levels([("css selector", "table"), ("css selector", 'a, b[title="x,y"], :is(c, d)')])
+    assert levels[1] == ("css selector", ':scope a, :scope b[title="x,y"], :scope :is(c, d)')
+
+
+def test_ids_become_css():
+    assert _convert_levels([("id", 'a"b')]) == [("css selector", '[id="a\\"b"]')]
+
+
+def test_xpath_literal_quoting():
+    assert _xpath_literal('plain') == '"plain"'
+    assert _xpath_literal('say "hi"') == "'say \"hi\"'"
+    assert _xpath_literal('it\'s "x"') == 'concat("it\'s ", \'"\', "x", \'"\', "")'
+
+
+def test_chained_clauses_resolve_outermost_first():
+    clause = By.NG_MODEL("x").within(By.CSS_SELECTOR("tr")).within(By.ID("grid"))
+    assert clause.levels() == [("id", "grid"), ("css selector", "tr"), ("css selector", '[ng-model="x"]')]
+
+
+def test_scoped_clause_levels():
+    clause = By.NG_CLICK.within(By.ID("grid"))
+    assert isinstance(clause, ScopedByClause)
+    assert clause.levels("save()") == [("id", "grid"), ("css selector", '[ng-click="save()"]')]
+
+
+def test_find_is_one_script_call():
+    element = WebElement(None, "element-id")
+    browser = FakeBrowser(element)
+    assert By.NG_MODEL.within(By.ID("grid")).find("x", browser) is element
+    assert len(browser.scripts) == 1
+
+
+def test_find_reports_the_missing_level():
+    browser = FakeBrowser(0)
+    with pytest.raises(NoSuchElementException) as e:
+        _find_levels([("id", "grid"), ("css selector", "tr")], browser)
+    assert "grid" in e.value.msg
+    assert "level 1 of 2" in e.value.msg
+
+
+def test_negative_scoped_clause_waits_for_leaving():
+    clause = By.NOT_INNER_TEXT.within(By.ID("grid"))
+    assert isinstance(clause, NegativeByClause)
+    assert clause.wait("gone", FakeBrowser(1)) is None
+
+
+def test_negative_bases_cant_be_scoped_directly():
+    with pytest.raises(ValueError):
+        ScopedByClause(By.NOT_ID, By.ID("grid"))
+
+
+def test_bound_clauses_unbind_to_a_scoped_clause():
+    what, by = By.NG_MODEL("x").within(By.ID("grid")).unbind()
+    assert what == "x"
+    assert isinstance(by, ScopedByClause)
+    assert By.NG_MODEL("x").unbind() == ("x", By.NG_MODEL)
+
+
+def test_browser_takes_bound_clauses():
+    element = WebElement(None, "element-id")
+    browser = FakeBrowser(element)
+    assert browser.wait_for(By.NG_MODEL("x").within(By.ID("grid"))) is element
+    assert browser.scripts[0][0] == [("css selector", '[id="grid"]'), ("css selector", ':scope [ng-model="x"]')]
+
+
+def test_bound_negative_clause_waits_for_leaving():
+    assert By.NOT_NG_MODEL("x").within(By.ID("grid")).wait(FakeBrowser(1)) is None
@@ -0,0 +1,177 @@
+import pytest
+from selenium.webdriver import Remote
+from selenium.common.exceptions import NoSuchWindowException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.switch_to import SwitchTo
+
+from ngSe.browser import BrowserMixin, TabSession
+from ngSe.exceptions import NewWindowError
+
+
+class FakeExecutor(object):
+
+    """Keeps track of windows and frames the way a driver would
+    """
+
+    def __init__(self, open_windows=True):
+        self.open_windows = open_windows
+        self.windows = ["w0"]
+        self.current = "w0"
+        self.frames = []
+        self.switches = 0
+        self.names = {}
+        self.closed = []
+
+    def execute(self, command, params):
+        value = None
+        if command == Command.W3C_GET_CURRENT_WINDOW_HANDLE:
+            value = self.current
+        elif command == Command.W3C_GET_WINDOW_HANDLES:
+            value = list(self.windows)
+        elif command == Command.W3C_EXECUTE_SCRIPT:
+            if "window.name" in params['script']:
+                value = self.names.get(self.current, "")
+            elif self.open_windows:
+                self.windows.append("w{}".format(len(self.windows)))
+        elif command == Command.SWITCH_TO_WINDOW:
+            if params['handle'] not in self.windows:
+                return {'value': {'error': 'no such window', 'message': params['handle']}}
+            self.current = params['handle']
+            self.frames = []
+            self.switches += 1
+        elif command == Command.SWITCH_TO_FRAME:
+            if params['id'] is None:
+                self.frames = []
+            else:
+                self.frames.append(params['id'])
+        elif command == Command.CLOSE:
+            self.windows.remove(self.current)
+            self.closed.append(self.current)
+        elif command == Command.GET_TITLE:
+            value = "{}/{}".format(self.current, ",".join(str(f) for f in self.frames))
+        return {'status': 0, 'value': value}
+
+
+class FakeBrowser(BrowserMixin, Remote):
+
+    def __init__(self, executor):
+        self.command_executor = executor
+        self.session_id = "session"
+        self.error_handler = ErrorHandler()
+        self._switch_to = SwitchTo(self)
+
+
+def test_each_tab_keeps_its_window_and_frame():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    first = session.new_browser("first")
+    second = session.new_browser("second")
+    assert first.handle != second.handle
+
+    first.switch_to.frame(1)
+    assert second.title == "{}/".format(second.handle)
+    assert first.title == "{}/1".format(first.handle)
+
+
+def test_switching_to_a_popup_makes_it_the_tabs_window():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    first = session.new_browser("first")
+    second = session.new_browser("second")
+    executor.windows.append("popup")
+
+    first.switch_to.window("popup")
+    assert second.title.startswith(second.handle)
+    assert first.title == "popup/"
+
+    first.close()
+    with pytest.raises(NoSuchWindowException):
+        first.title
+    assert second.title.startswith(second.handle)
+
+
+def test_no_switch_when_the_same_tab_keeps_going():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    first = session.new_browser("first")
+    session.new_browser("second")
+    first.title
+    switches = executor.switches
+    first.title
+    assert executor.switches == switches
+
+
+def test_blocked_window_open_raises():
+    session = TabSession(FakeBrowser(FakeExecutor(open_windows=False)))
+    session.new_window_timeout = 0.2
+    session.new_browser("first")
+    with pytest.raises(NewWindowError):
+        session.new_browser("second")
+
+
+def test_unknown_window_names_dont_take_other_tabs_windows():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    a = session.new_browser("a")
+    b = session.new_browser("b")
+    c = session.new_browser("c")
+    with pytest.raises(NoSuchWindowException):
+        a.switch_to.window("nonexistent-name")
+    assert a._windows == {a.handle}
+    assert a.title.startswith(a.handle)
+
+    a.quit()
+    assert b.handle not in executor.closed
+    assert c.handle not in executor.closed
+    assert c.title.startswith(c.handle)
+
+
+def test_cant_switch_to_another_tabs_window():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    a = session.new_browser("a")
+    b = session.new_browser("b")
+    with pytest.raises(NoSuchWindowException):
+        a.switch_to.window(b.handle)
+    assert a._windows == {a.handle}
+    assert a.title.startswith(a.handle)
+
+
+def test_popups_are_found_by_name_and_claimed():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    a = session.new_browser("a")
+    b = session.new_browser("b")
+    executor.windows.append("popup")
+    executor.names["popup"] = "help"
+    executor.names[b.handle] = "help-b"
+
+    a.switch_to.frame(2)
+    a.switch_to.window("help")
+    assert a.handle == "popup"
+    assert a.title == "popup/"
+    with pytest.raises(NoSuchWindowException):
+        b.switch_to.window("popup")
+
+
+def test_name_lookup_restores_the_tabs_frame():
+    executor = FakeExecutor()
+    session = TabSession(FakeBrowser(executor))
+    a = session.new_browser("a")
+    a.switch_to.frame(1)
+    with pytest.raises(NoSuchWindowException):
+        a.switch_to.window("nope")
+    assert a.title == "{}/1".format(a.handle)
+
+
+def test_failed_new_window_leaves_no_writer_behind(tmpdir, monkeypatch):
+    import ngSe.browser
+    created = []
+    monkeypatch.setattr(ngSe.browser, 'ArtifactWriter', lambda *args: created.append(args))
+    session = TabSession(FakeBrowser(FakeExecutor(open_windows=False)))
+    session.new_window_timeout = 0.1
+    session.new_browser("first")
+    with pytest.raises(NewWindowError):
+        session.new_browser("second", artifact_directory=str(tmpdir))
+    assert created == []
@@ -0,0 +1,62 @@
+from time import time
+
+import pytest
+
+from ngSe.utils import retry, deadline, current_deadline
+
+
+def test_budgets_only_shrink():
+    with deadline(1) as outer:
+        with deadline(10) as inner:
+            assert inner == outer
+            assert current_deadline() == outer
+        with deadline(0.5) as inner:
+            assert inner < outer
+        assert current_deadline() == outer
+    assert current_deadline() is None
+
+
+def test_inner_retry_ends_at_callers_end_time():
+    seen = {}
+
+    @retry(timeout=5, interval=0.01)
+    def inner():
+        seen['inner'] = current_deadline()
+        raise ValueError
+
+    @retry(timeout=0.2, interval=0.01)
+    def outer():
+        seen['outer'] = current_deadline()
+        inner()
+
+    start = time()
+    with pytest.raises(ValueError):
+        outer()
+    assert time() - start < 1
+    assert seen['inner'] == seen['outer']
+    assert current_deadline() is None
+
+
+def test_retry_honors_the_step_budget():
+    @retry(timeout=5, interval=0.01)
+    def never():
+        raise ValueError
+
+    start = time()
+    with deadline(0.2):
+        with pytest.raises(ValueError):
+            never()
+    assert time() - start < 1
+
+
+def test_retry_runs_at_least_once_when_out_of_budget():
+    calls = []
+
+    @retry(interval=0.01)
+    def once():
+        calls.append(1)
+        return "done"
+
+    with deadline(0):
+        assert once() == "done"
+    assert calls == [1]